@@ -0,0 +1,22 @@
+import os
+from dataclasses import dataclass
+from functools import cache
+
+from dotenv import load_dotenv
+
+
+@dataclass(frozen=True, slots=True)
+class Settings:
+    """Environment-derived configuration, read once per process"""
+    database_url: str
+    team_id: str | None
+
+
+@cache
+def settings() -> Settings:
+    """Parse .env/environment once and hand out the same frozen Settings"""
+    load_dotenv()
+    return Settings(
+        database_url=os.getenv("DATABASE_URL", "sqlite:///./app.db"),
+        team_id=os.getenv("TEAM_ID"),
+    )
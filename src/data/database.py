@@ -1,20 +1,62 @@
-from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-import os
 
-load_dotenv()
+from config import settings
 
-# If DATABASE_URL is not set in .env, default to SQLite
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./app.db")
+# If DATABASE_URL is not set in .env, settings() defaults to SQLite
+DATABASE_URL = settings().database_url
 
-# For SQLite, you usually need check_same_thread=False
-engine = create_engine(
-    DATABASE_URL, connect_args={"check_same_thread": False}, echo=False
-)
+if DATABASE_URL.startswith("sqlite"):
+    # For SQLite, you usually need check_same_thread=False
+    engine = create_engine(
+        DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        echo=False,
+        query_cache_size=1200,
+    )
+else:
+    # Server databases (e.g. the Supabase Postgres URL) get an explicitly
+    # sized pool: pre_ping drops stale connections instead of erroring,
+    # LIFO checkout lets overflow connections idle out between bursts.
+    engine = create_engine(
+        DATABASE_URL,
+        echo=False,
+        pool_size=10,
+        max_overflow=20,
+        pool_timeout=30,
+        pool_recycle=1800,
+        pool_pre_ping=True,
+        pool_use_lifo=True,
+        query_cache_size=1200,
+        # psycopg2 rewrites executemany batches into multi-row VALUES
+        # statements instead of looping single-row INSERTs on the wire
+        executemany_mode="values_plus_batch",
+        insertmanyvalues_page_size=1000,
+    )
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+if DATABASE_URL.startswith("sqlite"):
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        """Tune SQLite for the write-heavy sync pipeline.
+
+        WAL lets readers run during ingest and batches journal writes;
+        synchronous=NORMAL drops the per-commit fsync to one per
+        checkpoint, which is safe in WAL mode.
+        """
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA cache_size=-65536")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA mmap_size=268435456")
+        cursor.close()
+
+# autoflush off: ingest writes through Core statements, so there is no
+# pending unit-of-work to flush before reads. expire_on_commit off:
+# attribute access after commit reuses loaded state instead of
+# re-SELECTing every object.
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
 Base = declarative_base()
 
 
@@ -30,3 +72,35 @@ def get_db_session():
 def create_tables():
     """Create all tables in the database"""
     Base.metadata.create_all(bind=engine)
+
+
+# Both SQLite (SQLITE_MAX_VARIABLE_NUMBER) and PostgreSQL cap bind
+# parameters per statement at 32766/65535; stay safely under both
+_MAX_BIND_PARAMS = 30000
+
+
+def bulk_upsert(session, table, rows, pk_cols, chunk_size=1000):
+    """Insert rows into table, updating the non-key columns on conflict.
+
+    Replaces the per-row query-then-add pattern with one multi-row
+    INSERT ... ON CONFLICT DO UPDATE per chunk of rows.
+    """
+    if not rows:
+        return
+
+    if session.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+
+    update_cols = [col for col in rows[0] if col not in pk_cols]
+    # Each row binds len(rows[0]) parameters; shrink wide-row chunks so a
+    # batch never exceeds the driver's per-statement parameter limit
+    chunk_size = min(chunk_size, _MAX_BIND_PARAMS // len(rows[0]))
+    for start in range(0, len(rows), chunk_size):
+        stmt = dialect_insert(table).values(rows[start:start + chunk_size])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=pk_cols,
+            set_={col: stmt.excluded[col] for col in update_cols},
+        )
+        session.execute(stmt)
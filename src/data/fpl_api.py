@@ -1,67 +1,295 @@
+import asyncio
+import logging
 import os
+
+import aiohttp
+import orjson
 import requests
-from dotenv import load_dotenv
+from cachetools import TTLCache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config import settings
+
 
 class FPLApi:
     BASE_URL = "https://fantasy.premierleague.com/api"
 
+    # Cache TTLs (seconds) tiered by how often each endpoint actually changes:
+    # bootstrap/fixtures move at most once per gameweek, picks/transfers can
+    # change any time the manager acts.
+    LONG_TTL = 3600    # bootstrap-static, fixtures
+    MEDIUM_TTL = 1800  # element-summary
+    HISTORY_TTL = 900  # history
+    SHORT_TTL = 300    # picks, transfers, entry
+
+    # Large slow-changing payloads (bootstrap/fixtures) persist across runs
+    # with their ETag/Last-Modified so a cold start revalidates with a 304
+    # instead of re-downloading
+    DISK_CACHE_FILE = os.path.join(os.path.dirname(__file__), 'fpl_http_cache.json')
+
     def __init__(self):
-        load_dotenv()  # Load environment variables from .env
+        self.logger = logging.getLogger(__name__)
         self.session = requests.Session()
-        self.team_id = os.getenv("TEAM_ID")
+        # Retry transient failures (FPL throttles with 429/503 around
+        # deadlines) and keep enough pooled connections for batch fetches
+        retry = Retry(
+            total=5,
+            backoff_factor=0.3,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(['GET']),
+            respect_retry_after_header=True,
+        )
+        self.session.mount('https://', HTTPAdapter(pool_connections=32, pool_maxsize=64, max_retries=retry))
+        self.session.headers.update({
+            'Accept-Encoding': 'gzip, deflate, br',
+            'User-Agent': 'FPL-automator',
+        })
+        self.team_id = settings().team_id
+        self._long_cache = TTLCache(maxsize=8, ttl=self.LONG_TTL)
+        self._medium_cache = TTLCache(maxsize=1024, ttl=self.MEDIUM_TTL)
+        self._history_cache = TTLCache(maxsize=8, ttl=self.HISTORY_TTL)
+        self._short_cache = TTLCache(maxsize=64, ttl=self.SHORT_TTL)
+        self._disk_cache = self._load_disk_cache()
+
+    def _load_disk_cache(self):
+        try:
+            with open(self.DISK_CACHE_FILE, 'rb') as f:
+                return orjson.loads(f.read())
+        except (OSError, ValueError):
+            return {}
+
+    def _save_disk_cache(self):
+        try:
+            with open(self.DISK_CACHE_FILE, 'wb') as f:
+                f.write(orjson.dumps(self._disk_cache))
+        except OSError:
+            pass
+
+    def invalidate_cache(self, url_part=None):
+        """Drop cached responses whose URL contains url_part (all if None).
+
+        Lets callers force a refetch after a known mutation, e.g. drop
+        'picks' entries once a new gameweek's team has been saved.
+        """
+        caches = (self._long_cache, self._medium_cache, self._history_cache, self._short_cache)
+        for cache in caches:
+            if url_part is None:
+                cache.clear()
+            else:
+                for url in [u for u in cache if url_part in u]:
+                    del cache[url]
+        if url_part is None:
+            self._disk_cache.clear()
+        else:
+            for url in [u for u in self._disk_cache if url_part in u]:
+                del self._disk_cache[url]
+        self._save_disk_cache()
+
+    def _get_json_conditional(self, url, cache):
+        """Fetch with a conditional GET so unchanged payloads cost a 304, not a download"""
+        if url in cache:
+            return cache[url]
+        entry = self._disk_cache.get(url, {})
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        response = self.session.get(url, headers=headers)
+        if response.status_code == 304:
+            data = entry['body']
+        else:
+            response.raise_for_status()
+            data = orjson.loads(response.content)
+            self._disk_cache[url] = {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'body': data,
+            }
+            self._save_disk_cache()
+        cache[url] = data
+        return data
+
+    def _get_json(self, url, cache):
+        """Fetch a URL, caching the parsed JSON so repeat calls skip the network"""
+        if url in cache:
+            return cache[url]
+        response = self.session.get(url)
+        response.raise_for_status()
+        # orjson decodes the big bootstrap payload several times faster
+        # than stdlib json and returns the same dict/list types
+        data = orjson.loads(response.content)
+        cache[url] = data
+        return data
 
     def get_bootstrap_static(self):
         """Get all players, teams, and gameweek data"""
         url = f"{self.BASE_URL}/bootstrap-static/"
-        response = self.session.get(url)
-        response.raise_for_status()
-        return response.json()
+        return self._get_json_conditional(url, self._long_cache)
+
+    def bootstrap_ingested(self):
+        """True if the current bootstrap payload has already been written to the DB.
+
+        The flag lives on the disk-cache entry, so a fresh download (changed
+        ETag) clears it and a 304 revalidation keeps it; ingest code can use
+        it to skip re-processing an unchanged payload across runs.
+        """
+        url = f"{self.BASE_URL}/bootstrap-static/"
+        return bool(self._disk_cache.get(url, {}).get('ingested'))
+
+    def mark_bootstrap_ingested(self):
+        """Record that the cached bootstrap payload has been written to the DB"""
+        url = f"{self.BASE_URL}/bootstrap-static/"
+        entry = self._disk_cache.get(url)
+        if entry:
+            entry['ingested'] = True
+            self._save_disk_cache()
 
     def get_manager_team(self):
         """Get manager's general team info"""
         url = f"{self.BASE_URL}/entry/{self.team_id}/"
-        response = self.session.get(url)
-        response.raise_for_status()
-        return response.json()
+        return self._get_json(url, self._short_cache)
+
+    def _gameweek_finished(self, gameweek):
+        """Best-effort finished check against the cached bootstrap events.
+
+        Returns False when bootstrap hasn't been fetched yet, so callers
+        only treat a gameweek as immutable when the API has confirmed it.
+        """
+        bootstrap = self._long_cache.get(f"{self.BASE_URL}/bootstrap-static/")
+        if not bootstrap:
+            return False
+        event = next((e for e in bootstrap.get('events', []) if e['id'] == gameweek), None)
+        return bool(event and event.get('finished'))
 
     def get_picks(self, gameweek):
         """Get your team picks for a specific gameweek"""
         url = f"{self.BASE_URL}/entry/{self.team_id}/event/{gameweek}/picks/"
-        response = self.session.get(url)
-        response.raise_for_status()
-        return response.json()
+        # Picks for a finished gameweek never change again, so serve them
+        # from (and save them to) the persistent cache across runs
+        if self._gameweek_finished(gameweek):
+            entry = self._disk_cache.get(url)
+            if entry:
+                return entry['body']
+            data = self._get_json(url, self._short_cache)
+            self._disk_cache[url] = {'body': data}
+            self._save_disk_cache()
+            return data
+        return self._get_json(url, self._short_cache)
 
     def get_transfers(self):
         """Get all transfers made"""
         url = f"{self.BASE_URL}/entry/{self.team_id}/transfers/"
-        response = self.session.get(url)
-        response.raise_for_status()
-        return response.json()
+        return self._get_json(url, self._short_cache)
 
     def get_history(self):
         """Get manager's history including chip usage and past seasons"""
         url = f"{self.BASE_URL}/entry/{self.team_id}/history/"
-        response = self.session.get(url)
-        response.raise_for_status()
-        return response.json()
+        return self._get_json(url, self._history_cache)
 
     def get_entry(self):
         """Get manager's entry information (same as get_manager_team but with different naming for consistency)"""
         url = f"{self.BASE_URL}/entry/{self.team_id}/"
-        response = self.session.get(url)
-        response.raise_for_status()
-        return response.json()
+        return self._get_json(url, self._short_cache)
 
     def get_player_summary(self, player_id):
         """Get detailed player information including gameweek history and fixtures"""
         url = f"{self.BASE_URL}/element-summary/{player_id}/"
-        response = self.session.get(url)
-        response.raise_for_status()
-        return response.json()
+        return self._get_json(url, self._medium_cache)
+
+    async def _fetch_batch(self, urls, cache, concurrency):
+        """Fetch many URLs concurrently, reusing one connection pool.
+
+        Failed URLs yield None instead of aborting the batch: the FPL
+        API 404s element summaries for delisted players mid-season, and
+        one bad element should not throw away ~700 good responses.
+        Callers skip the missing entries.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(session, url):
+            if url in cache:
+                return cache[url]
+            try:
+                async with semaphore:
+                    async with session.get(url) as response:
+                        response.raise_for_status()
+                        data = await response.json(loads=orjson.loads)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as fetch_error:
+                self.logger.warning(f"Skipping {url}: {fetch_error}")
+                return None
+            cache[url] = data
+            return data
+
+        connector = aiohttp.TCPConnector(limit=concurrency, ttl_dns_cache=300)
+        async with aiohttp.ClientSession(connector=connector) as session:
+            return await asyncio.gather(*[fetch(session, url) for url in urls])
+
+    async def get_player_summaries(self, player_ids, concurrency=20):
+        """Get detailed info for many players concurrently, keyed by player id"""
+        urls = [f"{self.BASE_URL}/element-summary/{pid}/" for pid in player_ids]
+        results = await self._fetch_batch(urls, self._medium_cache, concurrency)
+        # Players whose fetch failed are simply absent from the mapping
+        return {pid: data for pid, data in zip(player_ids, results) if data is not None}
+
+    def get_player_summaries_sync(self, player_ids, concurrency=20):
+        """Synchronous wrapper around get_player_summaries"""
+        return asyncio.run(self.get_player_summaries(player_ids, concurrency))
+
+    async def get_picks_batch(self, gameweeks, concurrency=20):
+        """Get team picks for many gameweeks concurrently, keyed by gameweek"""
+        picks = {}
+        # Finished gameweeks resolve from the persistent cache; only the
+        # rest go out over the network
+        to_fetch = [gw for gw in gameweeks if not self._pick_from_disk(gw, picks)]
+        if to_fetch:
+            urls = [f"{self.BASE_URL}/entry/{self.team_id}/event/{gw}/picks/" for gw in to_fetch]
+            results = await self._fetch_batch(urls, self._short_cache, concurrency)
+            dirty = False
+            for gw, url, data in zip(to_fetch, urls, results):
+                if data is None:
+                    continue
+                picks[gw] = data
+                if self._gameweek_finished(gw):
+                    self._disk_cache[url] = {'body': data}
+                    dirty = True
+            if dirty:
+                self._save_disk_cache()
+        return picks
+
+    def _pick_from_disk(self, gameweek, picks):
+        """Load a finished gameweek's picks into picks; True on a cache hit"""
+        if not self._gameweek_finished(gameweek):
+            return False
+        url = f"{self.BASE_URL}/entry/{self.team_id}/event/{gameweek}/picks/"
+        entry = self._disk_cache.get(url)
+        if entry:
+            picks[gameweek] = entry['body']
+            return True
+        return False
+
+    def get_picks_batch_sync(self, gameweeks, concurrency=20):
+        """Synchronous wrapper around get_picks_batch"""
+        return asyncio.run(self.get_picks_batch(gameweeks, concurrency))
+
+    async def warmup_async(self):
+        """Pre-fetch the payloads every run needs, overlapping the requests"""
+        loop = asyncio.get_running_loop()
+        bootstrap, _ = await asyncio.gather(
+            loop.run_in_executor(None, self.get_bootstrap_static),
+            loop.run_in_executor(None, self.get_fixtures),
+        )
+        if self.team_id:
+            current_gw = next((e['id'] for e in bootstrap['events'] if e.get('is_current')), None)
+            if current_gw:
+                await loop.run_in_executor(None, self.get_picks, current_gw)
+
+    def warmup(self):
+        """Synchronous wrapper around warmup_async"""
+        asyncio.run(self.warmup_async())
 
     def get_fixtures(self):
         """Get all fixtures"""
         url = f"{self.BASE_URL}/fixtures/"
-        response = self.session.get(url)
-        response.raise_for_status()
-        return response.json()
+        return self._get_json_conditional(url, self._long_cache)
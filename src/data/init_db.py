@@ -1,8 +1,7 @@
 # init_db.py
 import logging
 from sqlalchemy import text
-from data.database import engine, SessionLocal
-from database import Base
+from data.database import engine, SessionLocal, Base
 
 logging.basicConfig(
     level=logging.INFO,
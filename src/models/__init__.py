@@ -7,6 +7,7 @@ from .manager_pick import ManagerPick
 from .transfer import Transfer
 from .player_gameweek_stats import PlayerGameweekStats
 from .fixture import Fixture
+from .team_fixture import TeamFixture
 
 # Make models available when importing from models
 __all__ = [
@@ -18,5 +19,6 @@ __all__ = [
     'Transfer',
     'PlayerGameweekStats',
     'Fixture',
+    'TeamFixture',
 ]
 
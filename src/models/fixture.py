@@ -5,7 +5,6 @@ from data.database import Base
 
 class Fixture(Base):
     __tablename__ = 'fixtures'
-    __table_args__ = {'extend_existing': True}  # Add this line
 
 
     id = Column(Integer, primary_key=True, autoincrement=True)
@@ -21,8 +20,8 @@ class Fixture(Base):
     finished = Column(Boolean, default=False)
 
     # Relationships to Team model (if you have a Team model)
-    home_team = relationship("Team", foreign_keys=[home_team_id])
-    away_team = relationship("Team", foreign_keys=[away_team_id])
+    home_team = relationship("Team", foreign_keys=[home_team_id], lazy='raise_on_sql')
+    away_team = relationship("Team", foreign_keys=[away_team_id], lazy='raise_on_sql')
 
     def __repr__(self):
         return f"<Gameweek {self.id}: GW{self.gameweek} - Home {self.home_team_id} vs Away {self.away_team_id}>"
@@ -4,7 +4,6 @@ from data.database import Base
 
 class Gameweek(Base):
     __tablename__ = 'gameweeks'
-    __table_args__ = {'extend_existing': True}  # Add this line
 
 
     id = Column(Integer, primary_key=True)
@@ -17,9 +16,9 @@ class Gameweek(Base):
     is_finished = Column(Boolean, default=False)
 
     # Relationships
-    manager_picks = relationship("ManagerPick", back_populates="gameweek_obj")
-    transfers = relationship("Transfer", back_populates="gameweek_obj")
-    player_stats = relationship("PlayerGameweekStats", back_populates="gameweek_obj")
+    manager_picks = relationship("ManagerPick", back_populates="gameweek_obj", lazy='raise_on_sql')
+    transfers = relationship("Transfer", back_populates="gameweek_obj", lazy='raise_on_sql')
+    player_stats = relationship("PlayerGameweekStats", back_populates="gameweek_obj", lazy='raise_on_sql')
 
     def __repr__(self):
         return f"<Gameweek {self.id}: {self.name}>"
\ No newline at end of file
@@ -4,18 +4,17 @@ from data.database import Base
 
 class Manager(Base):
     __tablename__ = "managers"
-    __table_args__ = {'extend_existing': True}  # Add this line
 
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
     current_gw = Column(Integer)
     total_points = Column(Integer, default=0)
-    overall_rank = Column(Integer)
+    overall_rank = Column(Integer, index=True)
 
     # Relationships
-    picks = relationship("ManagerPick", back_populates="manager")
-    transfers = relationship("Transfer", back_populates="manager")
+    picks = relationship("ManagerPick", back_populates="manager", lazy='raise_on_sql')
+    transfers = relationship("Transfer", back_populates="manager", lazy='raise_on_sql')
 
     def __repr__(self):
         return f"<Manager {self.name} - GW {self.current_gw} - {self.total_points} pts>"
\ No newline at end of file
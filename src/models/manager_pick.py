@@ -1,16 +1,20 @@
-from sqlalchemy import Column, Integer, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, Boolean, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from data.database import Base
 
 class ManagerPick(Base):
     __tablename__ = 'manager_picks'
-    __table_args__ = {'extend_existing': True}  # Add this line
+    __table_args__ = (
+        # Unique: one pick per player per gameweek per entry; also the
+        # conflict target for the bulk upsert
+        Index('ix_pick_entry_gw_player', 'entry_id', 'gameweek', 'player_id', unique=True),
+    )
 
 
     id = Column(Integer, primary_key=True)
     entry_id = Column(Integer, ForeignKey('managers.id'), nullable=False)
     gameweek = Column(Integer, ForeignKey('gameweeks.id'), nullable=False)
-    player_id = Column(Integer, ForeignKey('players.id'), nullable=False)
+    player_id = Column(Integer, ForeignKey('players.id'), nullable=False, index=True)
     position = Column(Integer, nullable=False)
     is_captain = Column(Boolean, default=False)
     is_vice_captain = Column(Boolean, default=False)
@@ -18,9 +22,9 @@ class ManagerPick(Base):
     points = Column(Integer, default=0)
 
     # Relationships
-    manager = relationship("Manager", back_populates="picks")
-    player = relationship("Player", back_populates="manager_picks")
-    gameweek_obj = relationship("Gameweek", back_populates="manager_picks")
+    manager = relationship("Manager", back_populates="picks", lazy='raise_on_sql')
+    player = relationship("Player", back_populates="manager_picks", lazy='selectin')
+    gameweek_obj = relationship("Gameweek", back_populates="manager_picks", lazy='raise_on_sql')
 
     def __repr__(self):
         return f"<ManagerPick(manager={self.entry_id}, gw={self.gameweek}, player={self.player_id})>"
\ No newline at end of file
@@ -4,7 +4,6 @@ from data.database import Base
 
 class Player(Base):
     __tablename__ = 'players'
-    __table_args__ = {'extend_existing': True}  # Add this line
 
 
     id = Column(Integer, primary_key=True)
@@ -21,9 +20,9 @@ class Player(Base):
     chance_of_playing_next_round = Column(Integer)
 
     # Relationships - using string references
-    team = relationship("Team", back_populates="players")
-    manager_picks = relationship("ManagerPick", back_populates="player")
-    gameweek_stats = relationship("PlayerGameweekStats", back_populates="player")
+    team = relationship("Team", back_populates="players", lazy='raise_on_sql')
+    manager_picks = relationship("ManagerPick", back_populates="player", lazy='raise_on_sql')
+    gameweek_stats = relationship("PlayerGameweekStats", back_populates="player", lazy='raise_on_sql')
 
     def __repr__(self):
         return f"<Player(id={self.id}, web_name='{self.web_name}', team_id={self.team_id})>"
\ No newline at end of file
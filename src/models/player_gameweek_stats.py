@@ -1,39 +1,43 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, Float
+from sqlalchemy import Column, Integer, SmallInteger, String, Boolean, ForeignKey, Float, Index
 from sqlalchemy.orm import relationship
 from data.database import Base
 
 class PlayerGameweekStats(Base):
     __tablename__ = 'player_gameweek_stats'
-    __table_args__ = {'extend_existing': True}  # Add this line
+    __table_args__ = (
+        Index('ix_pgs_player_gw', 'player_id', 'gameweek', unique=True),
+    )
 
 
     id = Column(Integer, primary_key=True)
-    player_id = Column(Integer, ForeignKey('players.id'), nullable=False)
+    player_id = Column(Integer, ForeignKey('players.id'), nullable=False, index=True)
     gameweek = Column(Integer, ForeignKey('gameweeks.id'), nullable=False)
     expected_points = Column(Float, nullable=False)
-    points = Column(Integer, default=0)
+    # Per-gameweek counters all fit comfortably in 2 bytes; SmallInteger
+    # halves the row width for the widest table in the schema
+    points = Column(SmallInteger, default=0)
     opponent_team = Column(String)
     was_home = Column(Boolean)
-    minutes = Column(Integer, default=0)
-    goals_scored = Column(Integer, default=0)
-    assists = Column(Integer, default=0)
-    goals_conceded = Column(Integer, default=0)
-    saves = Column(Integer, default=0)
-    bonus = Column(Integer, default=0)
-    bps = Column(Integer, default=0)
-    yellow_cards = Column(Integer, default=0)
-    red_cards = Column(Integer, default=0)
-    penalties_saved = Column(Integer, default=0)
-    penalties_missed = Column(Integer, default=0)
-    own_goals = Column(Integer, default=0)
+    minutes = Column(SmallInteger, default=0)
+    goals_scored = Column(SmallInteger, default=0)
+    assists = Column(SmallInteger, default=0)
+    goals_conceded = Column(SmallInteger, default=0)
+    saves = Column(SmallInteger, default=0)
+    bonus = Column(SmallInteger, default=0)
+    bps = Column(SmallInteger, default=0)
+    yellow_cards = Column(SmallInteger, default=0)
+    red_cards = Column(SmallInteger, default=0)
+    penalties_saved = Column(SmallInteger, default=0)
+    penalties_missed = Column(SmallInteger, default=0)
+    own_goals = Column(SmallInteger, default=0)
     expected_goals = Column(Float, default=0.0)
     expected_assists = Column(Float, default=0.0)
     expected_goal_involvements = Column(Float, default=0.0)
     expected_goals_conceded = Column(Float, default=0.0)
 
     # Relationships
-    player = relationship("Player", back_populates="gameweek_stats")
-    gameweek_obj = relationship("Gameweek", back_populates="player_stats")
+    player = relationship("Player", back_populates="gameweek_stats", lazy='selectin')
+    gameweek_obj = relationship("Gameweek", back_populates="player_stats", lazy='raise_on_sql')
 
     def __repr__(self):
         return f"<PlayerGameweekStats(player={self.player_id}, gw={self.gameweek}, mins={self.minutes})>"
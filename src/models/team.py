@@ -4,7 +4,6 @@ from data.database import Base
 
 class Team(Base):
     __tablename__ = 'teams'
-    __table_args__ = {'extend_existing': True}  # Add this line
 
 
     id = Column(Integer, primary_key=True)
@@ -18,7 +17,7 @@ class Team(Base):
     strength_defence_away = Column(Integer, nullable=True)
 
     # Relationships - using string references to avoid circular imports
-    players = relationship("Player", back_populates="team")
+    players = relationship("Player", back_populates="team", lazy='raise_on_sql')
 
     def __repr__(self):
         return f"<Team(id={self.id}, name='{self.name}', short_name='{self.short_name}')>"
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, Boolean, ForeignKey, Index
+from data.database import Base
+
+
+class TeamFixture(Base):
+    """Per-team denormalization of Fixture.
+
+    Each fixture contributes one row per side, so "this team's fixture in
+    this gameweek" becomes an index seek on (team_id, gameweek) instead of
+    an OR filter across home_team_id/away_team_id, and difficulty is a
+    real column from the team's own perspective.
+    """
+    __tablename__ = 'team_fixtures'
+    __table_args__ = (
+        # Not unique: double gameweeks give a team two rows in one gameweek
+        Index('ix_team_fixture_team_gw', 'team_id', 'gameweek'),
+    )
+
+    fixture_id = Column(Integer, ForeignKey('fixtures.id'), primary_key=True)
+    team_id = Column(Integer, ForeignKey('teams.id'), primary_key=True)
+    gameweek = Column(Integer, nullable=False)
+    opponent_id = Column(Integer, ForeignKey('teams.id'), nullable=False)
+    is_home = Column(Boolean, nullable=False)
+    difficulty = Column(Integer, nullable=False)
+
+    def __repr__(self):
+        return f"<TeamFixture(team={self.team_id}, gw={self.gameweek}, opponent={self.opponent_id}, difficulty={self.difficulty})>"
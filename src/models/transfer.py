@@ -1,11 +1,13 @@
-from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Boolean, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from data.database import Base
 
 class Transfer(Base):
     __tablename__ = 'transfers'
-    __table_args__ = {'extend_existing': True}  # Add this line
+    __table_args__ = (
+        Index('ix_transfer_entry_gw_time', 'entry_id', 'gameweek', 'transfer_time', unique=True),
+    )
 
 
     id = Column(Integer, primary_key=True)
@@ -22,10 +24,10 @@ class Transfer(Base):
     cost = Column(Integer, default=4)
 
     # Relationships
-    manager = relationship("Manager", back_populates="transfers")
-    gameweek_obj = relationship("Gameweek", back_populates="transfers")
-    player_in = relationship("Player", foreign_keys=[player_in_id])
-    player_out = relationship("Player", foreign_keys=[player_out_id])
+    manager = relationship("Manager", back_populates="transfers", lazy='raise_on_sql')
+    gameweek_obj = relationship("Gameweek", back_populates="transfers", lazy='raise_on_sql')
+    player_in = relationship("Player", foreign_keys=[player_in_id], lazy='raise_on_sql')
+    player_out = relationship("Player", foreign_keys=[player_out_id], lazy='raise_on_sql')
 
     def __repr__(self):
         return f"<Transfer(manager={self.entry_id}, gw={self.gameweek}, out={self.player_out_name}, in={self.player_in_name})>"
\ No newline at end of file
@@ -1,37 +1,58 @@
-import statistics
-from typing import List, Dict, Optional
+import heapq
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Dict, Optional
 
-from sqlalchemy import desc, text
-from sqlalchemy.dialects.postgresql import Any
+import numpy as np
+import pandas as pd
+
+from sqlalchemy import bindparam, desc, func, select
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 from sqlalchemy.sql.operators import and_, or_
 
 from data.database import SessionLocal
-from models import ManagerPick, Fixture, PlayerGameweekStats, Player
-from optimizer.data_utils import get_available_players, get_current_team
+from models import ManagerPick, Fixture, PlayerGameweekStats, TeamFixture
+from optimizer.data_utils import load_gameweek_inputs, player_frame
 from optimizer.transfer_optimizer import TransferOptimizer
 
 
+# Constant weight tables built once at import, not per call or instance
+# Trend weighting favours the most recent of the five form games
+_FORM_TREND_WEIGHTS = np.array([1, 1.2, 1.4, 1.6, 2.0])
+# Harmonic decay over the last five meetings with an opponent
+_RECENCY_WEIGHTS = 1.0 / np.arange(1, 6)
+# Banded average-points bonuses: searchsorted over the shared thresholds
+# picks the band (<4, >=4, >=6, >=8) without an if-cascade per player
+_AVG_POINTS_THRESHOLDS = np.array([4.0, 6.0, 8.0])
+_HISTORICAL_BONUS_TABLE = np.array([0.0, 0.05, 0.10, 0.15])
+_RECENCY_BONUS_TABLE = np.array([0.0, 0.01, 0.02, 0.03])
+
+# Set FPL_VERBOSE=0 to skip writing the advisory report to stdout,
+# e.g. in scheduled batch runs that only want the side effects
+VERBOSE = os.environ.get("FPL_VERBOSE", "1") == "1"
+
+
 class CaptainAdvisor:
     """Provides captain and vice-captain recommendations"""
     POSITION_MAP = {1: "GK", 2: "DEF", 3: "MID", 4: "FWD"}
 
-    def __init__(self):
-        self.position_weights = {
-            '4': {1.2}, #FWD
-            '3': {1.1},  #MID
-            '2': {0.9}, #DEF
-            '1': {0.3} #GK
-        }
+    # Position multipliers precompiled into a gather array: one integer
+    # index per score instead of nested dict lookups. The old dict was
+    # keyed by element_type strings ('4', '3', ...) while scoring looked
+    # up 'FWD'/'MID', so every player silently fell back to 1.0.
+    _position_index = {'GK': 0, 'DEF': 1, 'MID': 2, 'FWD': 3}
+    _position_weights = np.array([0.3, 0.9, 1.1, 1.2], dtype=np.float32)
 
-        # Add form weight factors
-        self.form_weights = {
-            'recent_points': 0.4,
-            'season_points': 0.2,
-            'fixture_difficulty': 0.2,
-            'home_advantage': 0.1,
-            'historical': 0.1
-        }
+    # Form weight factors
+    form_weights = {
+        'recent_points': 0.4,
+        'season_points': 0.2,
+        'fixture_difficulty': 0.2,
+        'home_advantage': 0.1,
+        'historical': 0.1
+    }
 
 
     def suggest_captain(self, team: List[Dict], gameweek: int, session: Session) -> Dict:
@@ -43,63 +64,129 @@ class CaptainAdvisor:
         - Recent form
         - Historical performance vs opponent
         """
-        captain_scores = []
+        # One fixture query for the whole squad instead of two per player
+        fixtures_by_team = self._load_fixtures_for_teams(
+            {p['team_id'] for p in team}, gameweek, session
+        )
+        # ... and one stats query covering every player's recent gameweeks,
+        # serving the base score, fallback and form trend without further
+        # per-player round-trips
+        stats_by_player = self._prefetch_captain_stats(
+            [p['id'] for p in team], gameweek, session
+        )
 
-        for player in team:
-            score = self._calculate_captain_score(player, gameweek, session)
-            captain_scores.append({
+        def score_one(player: Dict, player_session: Session) -> Dict:
+            fixture = fixtures_by_team.get(player['team_id'])
+            # Fixture and home bonuses feed both the score and the
+            # reasons, so derive them once per player
+            fixture_score = self._get_fixture_score(fixture)
+            home_bonus = self._get_home_advantage(fixture)
+            score = self._calculate_captain_score(
+                player, gameweek, player_session, fixture,
+                stats_by_player.get(player['id'], []),
+                fixture_score, home_bonus
+            )
+            return {
                 'player': player,
                 'score': score,
-                'reasons': self._get_captain_reasons(player, gameweek, session)
-            })
+                'reasons': self._get_captain_reasons(player, fixture_score, home_bonus)
+            }
+
+        # Scoring is in-memory except the per-player historical-opponent
+        # query, so full squads overlap those round-trips in worker
+        # threads; Sessions are not thread-safe, each worker opens its own
+        if len(team) > 5:
+            def score_with_own_session(player: Dict) -> Dict:
+                with SessionLocal() as worker_session:
+                    return score_one(player, worker_session)
+
+            with ThreadPoolExecutor(max_workers=min(8, len(team))) as executor:
+                captain_scores = list(executor.map(score_with_own_session, team))
+        else:
+            captain_scores = [score_one(player, session) for player in team]
 
-        # Sort by score descending
-        captain_scores.sort(key=lambda x: x['score'], reverse=True)
+        # Only the top five are reported; nlargest selects them without
+        # sorting the whole squad and keeps sorted()'s ordering for ties
+        top_five = heapq.nlargest(5, captain_scores, key=lambda x: x['score'])
 
         return {
-            'captain': captain_scores[0],
-            'vice_captain': captain_scores[1],
-            'alternatives': captain_scores[2:5]
+            'captain': top_five[0],
+            'vice_captain': top_five[1],
+            'alternatives': top_five[2:5]
         }
 
-    def _calculate_captain_score(self, player: dict, gameweek: int, session: Session) -> float:
-        """Calculate comprehensive captain score"""
+    @staticmethod
+    def _prefetch_captain_stats(player_ids: List[int], gameweek: int,
+                                session: Session) -> Dict[int, List]:
+        """Load every squad member's prior gameweek stats in one query.
 
-        weekly_stats = (
-            session.query(PlayerGameweekStats)
-            .filter_by(player_id=player['id'], gameweek=gameweek-1)
-            .first()
-        )
-        # Get most recent gameweek stats
-        if not weekly_stats:
+        Selects just the scored columns as plain Rows — no ORM hydration
+        or identity-map bookkeeping for read-only input. Rows come back
+        newest-first per player, so index 0 is the latest gameweek on
+        record and the first five give the form window.
+        """
+        rows = session.query(
+            PlayerGameweekStats.player_id,
+            PlayerGameweekStats.gameweek,
+            PlayerGameweekStats.expected_points,
+            PlayerGameweekStats.points,
+        ).filter(
+            PlayerGameweekStats.player_id.in_(player_ids),
+            PlayerGameweekStats.gameweek < gameweek
+        ).order_by(desc(PlayerGameweekStats.gameweek)).all()
+
+        by_player: Dict[int, List] = {}
+        for row in rows:
+            by_player.setdefault(row.player_id, []).append(row)
+        return by_player
+
+    @staticmethod
+    def _load_fixtures_for_teams(team_ids: set, gameweek: int, session: Session) -> Dict[int, TeamFixture]:
+        """Load the gameweek's fixtures for a set of teams, keyed by team id"""
+        fixtures = session.query(TeamFixture).filter(
+            TeamFixture.gameweek == gameweek,
+            TeamFixture.team_id.in_(team_ids)
+        ).all()
 
-            # Try to get player's general expected points from the player dict
-            base_score = player.get('expected_points', 0.0)
+        by_team = {}
+        for fixture in fixtures:
+            # setdefault keeps the first fixture of a double gameweek
+            by_team.setdefault(fixture.team_id, fixture)
+        return by_team
 
-            latest_stats = (
-                session.query(PlayerGameweekStats)
-                .filter_by(player_id=player['id'])
-                .order_by(desc(PlayerGameweekStats.gameweek))
-                .first()
-            )
-            base_score = latest_stats.expected_points if latest_stats else 0.0
+    def _calculate_captain_score(self, player: dict, gameweek: int, session: Session,
+                                 fixture: Optional[TeamFixture], stats: List,
+                                 fixture_score: float, home_bonus: float) -> float:
+        """Calculate comprehensive captain score"""
+        try:
+            return self._score_captain(player, gameweek, session, fixture, stats,
+                                       fixture_score, home_bonus)
+        except SQLAlchemyError as e:
+            # One handler for the whole scoring path; the helpers below
+            # use explicit guards instead of their own try frames
+            print(f"Error calculating captain score for player {player.get('id')}: {e}")
+            return 0.0
 
-        base_score = weekly_stats.expected_points or 0.0
+    def _score_captain(self, player: dict, gameweek: int, session: Session,
+                       fixture: Optional[TeamFixture], stats: List,
+                       fixture_score: float, home_bonus: float) -> float:
+        # stats is newest-first, so the head row is the previous gameweek
+        # when it exists and otherwise the most recent one on record; fall
+        # back to the player's general estimate with no history at all
+        if stats:
+            base_score = stats[0].expected_points or 0.0
+        else:
+            base_score = player.get('expected_points', 0.0)
 
         # Position weight
-        position_multiplier = self.position_weights.get(player['position'], 1.0)
-
-        # Fixture difficulty (lower difficulty = higher score)
-        fixture_score = self._get_fixture_score(player['team_id'], gameweek, session)
+        pos_idx = self._position_index.get(player['position'])
+        position_multiplier = float(self._position_weights[pos_idx]) if pos_idx is not None else 1.0
 
         # Form trend (recent 5 games)
-        form_score = self._get_form_trend(player['id'], session)
-
-        # Home advantage
-        home_bonus = self._get_home_advantage(player['team_id'], gameweek, session)
+        form_score = self._get_form_trend([s.points for s in stats[:5]][::-1])
 
         # Historical performance vs opponent
-        history_bonus = self._get_historical_performance(player['id'], gameweek, session)
+        history_bonus = self._get_historical_performance(player, gameweek, session, fixture)
 
         total_score = (
                 base_score * position_multiplier *
@@ -109,48 +196,24 @@ class CaptainAdvisor:
         return round(total_score, 2)
 
 
-    def _get_fixture_score(self, team_id: int, gameweek: int, session: Session) -> float:
+    def _get_fixture_score(self, fixture: Optional[TeamFixture]) -> float:
         """Get fixture difficulty score (0.0 to 0.3 bonus)"""
-        try:
-            fixture = session.query(Fixture).filter_by(
-                gameweek=gameweek
-            ).filter(
-                (Fixture.home_team_id == team_id) | (Fixture.away_team_id == team_id)
-            ).first()
-
-            if not fixture:
-                return 0.0
-
-            # Assume fixture has difficulty rating (1-5, where 1 is easiest)
-            opponent_strength = getattr(fixture, 'difficulty', 3)
-            return (6 - opponent_strength) * 0.06  # 0.0 to 0.3 range
-
-        except Exception:
+        if not fixture:
             return 0.0
 
-    def _get_form_trend(self, player_id: int, session: Session) -> float:
-        """Get recent form trend (-0.2 to 0.2)"""
-        try:
-            # Get last 5 gameweek performances
-            recent_stats = session.query(PlayerGameweekStats).filter(
-                PlayerGameweekStats.player_id == player_id
-            ).order_by(desc(PlayerGameweekStats.gameweek)).limit(5).all()
-
-            if len(recent_stats) < 3:  # Need at least 3 games for trend
-                return 0.0
+        # Difficulty rating is 1-5, where 1 is easiest
+        return (6 - fixture.difficulty) * 0.06  # 0.0 to 0.3 range
 
-            # Extract points from recent games (reverse to get chronological order)
-            recent_points = [stat.points for stat in reversed(recent_stats)]
-
-            # Calculate weighted average trend
-            trend_score = self._calculate_trend_score(recent_points)
+    def _get_form_trend(self, recent_points: List[int]) -> float:
+        """Get recent form trend (-0.2 to 0.2) from chronological recent points"""
+        if len(recent_points) < 3:  # Need at least 3 games for trend
+            return 0.0
 
-            # Normalize to -0.2 to 0.2 range
-            return max(-0.2, min(0.2, trend_score))
+        # Calculate weighted average trend
+        trend_score = self._calculate_trend_score(recent_points)
 
-        except Exception as e:
-            print(f"Error calculating form trend for player {player_id}: {e}")
-            return 0.0
+        # Normalize to -0.2 to 0.2 range
+        return max(-0.2, min(0.2, trend_score))
 
     def _calculate_trend_score(self, points_sequence: List[int]) -> float:
         """
@@ -160,16 +223,16 @@ class CaptainAdvisor:
         if len(points_sequence) < 3:
             return 0.0
 
+        points = np.asarray(points_sequence, dtype=np.float64)
+
         # Method 1: Linear regression slope
-        slope = self._calculate_linear_slope(points_sequence)
+        slope = self._calculate_linear_slope(points)
 
-        # Method 2: Weighted recent performance
-        weights = [1, 1.2, 1.4, 1.6, 2.0]  # More weight to recent games
-        if len(weights) > len(points_sequence):
-            weights = weights[-len(points_sequence):]
+        # Method 2: Weighted recent performance (more weight to recent games)
+        weights = _FORM_TREND_WEIGHTS[-points.size:]
 
-        weighted_avg = sum(p * w for p, w in zip(points_sequence, weights)) / sum(weights)
-        overall_avg = statistics.mean(points_sequence)
+        weighted_avg = float(points @ weights) / float(weights.sum())
+        overall_avg = float(points.mean())
 
         # Combine methods
         trend_indicator = (slope * 0.7) + ((weighted_avg - overall_avg) * 0.3)
@@ -177,76 +240,51 @@ class CaptainAdvisor:
         # Scale to appropriate range
         return trend_indicator * 0.05  # Adjust scaling factor as needed
 
-    def _calculate_linear_slope(self, points_sequence: List[int]) -> float:
+    def _calculate_linear_slope(self, points_sequence) -> float:
         """Calculate linear regression slope for trend analysis"""
-        n = len(points_sequence)
+        points = np.asarray(points_sequence, dtype=np.float64)
+        n = points.size
         if n < 2:
             return 0.0
 
-        x_values = list(range(n))
-        x_mean = statistics.mean(x_values)
-        y_mean = statistics.mean(points_sequence)
-
-        numerator = sum((x - x_mean) * (y - y_mean) for x, y in zip(x_values, points_sequence))
-        denominator = sum((x - x_mean) ** 2 for x in x_values)
-
+        # Closed-form least squares over centered arrays
+        x_centered = np.arange(n) - (n - 1) / 2
+        denominator = float((x_centered ** 2).sum())
         if denominator == 0:
             return 0.0
 
-        return numerator / denominator
+        return float((x_centered * (points - points.mean())).sum()) / denominator
 
 
 
-    def _get_home_advantage(self, team_id: int, gameweek: int, session: Session) -> float:
+    def _get_home_advantage(self, fixture: Optional[TeamFixture]) -> float:
         """Get home advantage bonus (0.0 or 0.1)"""
-        try:
-            fixture = session.query(Fixture).filter_by(
-                gameweek=gameweek, home_team_id=team_id
-            ).first()
-            return 0.1 if fixture else 0.0
-        except Exception:
-            return 0.0
+        return 0.1 if fixture and fixture.is_home else 0.0
 
-    def _get_historical_performance(self, player_id: int, gameweek: int, session: Session) -> float:
+    def _get_historical_performance(self, player: Dict, gameweek: int, session: Session,
+                                    current_fixture: Optional[TeamFixture]) -> float:
         """Get historical performance vs opponent (0.0 to 0.15)"""
-        # This would analyze past performances against the same opponent
-        try:
-            # Get the upcoming fixture to find opponent
-            current_fixture = self._get_player_fixture(player_id, gameweek, session)
-            if not current_fixture:
-                return 0.0
-
-            # Determine opponent team
-            player_team_id = self._get_player_team_id(player_id, session)
-            if not player_team_id:
-                return 0.0
-
-            if current_fixture.home_team_id == player_team_id:
-                opponent_id = current_fixture.away_team_id
-                is_home = True
-            else:
-                opponent_id = current_fixture.home_team_id
-                is_home = False
-
-            # Get historical performances against this opponent
-            historical_performances = self._get_performances_vs_opponent(
-                player_id, opponent_id, gameweek, session
-            )
+        # The upcoming fixture identifies the opponent; without one there
+        # is no history to consult. DB errors propagate to the single
+        # handler in _calculate_captain_score.
+        if not current_fixture:
+            return 0.0
 
-            if not historical_performances:
-                return 0.0
+        historical_performances = self._get_performances_vs_opponent(
+            player['id'], player['team_id'], current_fixture.opponent_id,
+            gameweek, session
+        )
 
-            # Calculate performance bonus
-            performance_bonus = self._calculate_historical_bonus(
-                historical_performances, is_home
-            )
+        if not historical_performances:
+            return 0.0
 
-            # Return value between 0.0 and 0.15
-            return max(0.0, min(0.15, performance_bonus))
+        # Calculate performance bonus
+        performance_bonus = self._calculate_historical_bonus(
+            historical_performances, current_fixture.is_home
+        )
 
-        except Exception as e:
-            print(f"Error calculating historical performance for player {player_id}: {e}")
-            return 0.0
+        # Return value between 0.0 and 0.15
+        return max(0.0, min(0.15, performance_bonus))
 
     def _calculate_historical_bonus(self, performances: List[Dict], is_home: bool) -> float:
         """
@@ -256,19 +294,26 @@ class CaptainAdvisor:
         if not performances:
             return 0.0
 
-        # Separate home and away performances
-        home_performances = [p for p in performances if p['was_home']]
-        away_performances = [p for p in performances if not p['was_home']]
+        # One pass accumulates overall and home totals; away falls out by
+        # subtraction instead of re-filtering the list per context
+        total_points = 0
+        home_points = 0
+        home_count = 0
+        for p in performances:
+            total_points += p['points']
+            if p['was_home']:
+                home_points += p['points']
+                home_count += 1
+        away_count = len(performances) - home_count
 
-        # Calculate average points
-        overall_avg = statistics.mean([p['points'] for p in performances])
+        overall_avg = total_points / len(performances)
 
         # Context-specific average
-        if is_home and home_performances:
-            context_avg = statistics.mean([p['points'] for p in home_performances])
+        if is_home and home_count:
+            context_avg = home_points / home_count
             context_weight = 0.7
-        elif not is_home and away_performances:
-            context_avg = statistics.mean([p['points'] for p in away_performances])
+        elif not is_home and away_count:
+            context_avg = (total_points - home_points) / away_count
             context_weight = 0.7
         else:
             context_avg = overall_avg
@@ -278,14 +323,9 @@ class CaptainAdvisor:
         weighted_avg = (context_avg * context_weight) + (overall_avg * (1 - context_weight))
 
         # Calculate bonus based on performance level
-        if weighted_avg >= 8:
-            base_bonus = 0.15
-        elif weighted_avg >= 6:
-            base_bonus = 0.10
-        elif weighted_avg >= 4:
-            base_bonus = 0.05
-        else:
-            base_bonus = 0.0
+        base_bonus = float(_HISTORICAL_BONUS_TABLE[
+            np.searchsorted(_AVG_POINTS_THRESHOLDS, weighted_avg, side='right')
+        ])
 
         # Adjust for consistency
         if len(performances) >= 3:
@@ -304,22 +344,25 @@ class CaptainAdvisor:
         Calculate bonus for consistent performances
         Lower variance = higher bonus
         """
-        if len(points_list) < 2:
+        n = len(points_list)
+        if n < 2:
             return 0.0
 
-        try:
-            avg_points = statistics.mean(points_list)
-            variance = statistics.variance(points_list)
-
-            # High average with low variance gets bonus
-            if avg_points >= 6 and variance <= 4:
-                return 0.02
-            elif avg_points >= 4 and variance <= 6:
-                return 0.01
-            else:
-                return 0.0
-
-        except Exception:
+        # One-pass sample variance from the sum and sum of squares
+        total = 0.0
+        total_sq = 0.0
+        for points in points_list:
+            total += points
+            total_sq += points * points
+        avg_points = total / n
+        variance = (total_sq - n * avg_points * avg_points) / (n - 1)
+
+        # High average with low variance gets bonus
+        if avg_points >= 6 and variance <= 4:
+            return 0.02
+        elif avg_points >= 4 and variance <= 6:
+            return 0.01
+        else:
             return 0.0
 
     def _calculate_recency_bonus(self, performances: List[Dict]) -> float:
@@ -330,142 +373,85 @@ class CaptainAdvisor:
         if not performances:
             return 0.0
 
-        # Sort by gameweek (most recent first)
+        # Sort by gameweek (most recent first) and weight the last five
+        # meetings harmonically as one dot product
         sorted_performances = sorted(performances, key=lambda x: x['gameweek'], reverse=True)
+        points = np.array([p['points'] for p in sorted_performances[:5]], dtype=np.float64)
+        weights = _RECENCY_WEIGHTS[:points.size]
 
-        # Weight recent performances more heavily
-        weighted_score = 0
-        total_weight = 0
-
-        for i, perf in enumerate(sorted_performances[:5]):  # Consider last 5 meetings
-            weight = 1.0 / (i + 1)  # Decreasing weight for older games
-            weighted_score += perf['points'] * weight
-            total_weight += weight
-
-        if total_weight == 0:
-            return 0.0
-
-        weighted_avg = weighted_score / total_weight
+        weighted_avg = float(points @ weights) / float(weights.sum())
 
         # Convert to bonus (0.0 to 0.03)
-        if weighted_avg >= 8:
-            return 0.03
-        elif weighted_avg >= 6:
-            return 0.02
-        elif weighted_avg >= 4:
-            return 0.01
-        else:
-            return 0.0
+        return float(_RECENCY_BONUS_TABLE[
+            np.searchsorted(_AVG_POINTS_THRESHOLDS, weighted_avg, side='right')
+        ])
 
-    def _get_performances_vs_opponent(self, player_id: int, opponent_id: int,
-                                      current_gameweek: int, session: Session,
-                                      seasons_back: int = 2) -> List[Dict]:
+    def _get_performances_vs_opponent(self, player_id: int, player_team_id: int,
+                                      opponent_id: int, current_gameweek: int,
+                                      session: Session, seasons_back: int = 2) -> List[Dict]:
         """
         Get historical performances against specific opponent
         Limited to last N seasons to keep data relevant
         """
-        try:
-            # Calculate gameweek cutoff (approximately 2 seasons = 76 gameweeks)
-            gameweek_cutoff = max(1, current_gameweek - (seasons_back * 38))
-
-            # Get all fixtures where player's team faced opponent
-            player_team_id = self._get_player_team_id(player_id, session)
-            if not player_team_id:
-                return []
-
-            # Find historical fixtures
-            historical_fixtures = session.query(Fixture).filter(
-                Fixture.gameweek >= gameweek_cutoff,
-                Fixture.gameweek < current_gameweek,
-                or_(
-                    and_(
-                        Fixture.home_team_id == player_team_id,
-                        Fixture.away_team_id == opponent_id
-                    ),
-                    and_(
-                        Fixture.away_team_id == player_team_id,
-                        Fixture.home_team_id == opponent_id
-                    )
-                )
-            ).all()
-
-            # Get player stats for these fixtures
-            performances = []
-            for fixture in historical_fixtures:
-                stats = session.query(PlayerGameweekStats).filter(
-                    and_(
-                        PlayerGameweekStats.player_id == player_id,
-                        PlayerGameweekStats.gameweek == fixture.gameweek
-                    )
-                ).first()
-
-                if stats:
-                    was_home = fixture.home_team_id == player_team_id
-                    performances.append({
-                        'gameweek': fixture.gameweek,
-                        'points': stats.points,
-                        'was_home': was_home,
-                        'goals': getattr(stats, 'goals_scored', 0),
-                        'assists': getattr(stats, 'assists', 0),
-                        'minutes': getattr(stats, 'minutes_played', 0),
-                        'clean_sheet': getattr(stats, 'clean_sheets', 0)
-                    })
-
-            return performances
-
-        except Exception as e:
-            print(f"Error getting performances vs opponent: {e}")
-            return []
-
-    def _get_player_fixture(self, player_id: int, gameweek: int, session: Session) -> Optional[Fixture]:
-        """Get the fixture for a player in a specific gameweek"""
-        try:
-            # Get player's team
-            player_team_id = self._get_player_team_id(player_id, session)
-            if not player_team_id:
-                return None
-
-            # Find fixture for this team in this gameweek
-            fixture = session.query(Fixture).filter(
+        # Calculate gameweek cutoff (approximately 2 seasons = 76 gameweeks)
+        gameweek_cutoff = max(1, current_gameweek - (seasons_back * 38))
+
+        # One join returns the fixture context and the player's stats
+        # row together, replacing the per-fixture stats query; plain
+        # column entities skip ORM hydration for read-only input
+        rows = session.query(
+            Fixture.gameweek, Fixture.home_team_id,
+            PlayerGameweekStats.points, PlayerGameweekStats.goals_scored,
+            PlayerGameweekStats.assists, PlayerGameweekStats.minutes
+        ).join(
+            PlayerGameweekStats,
+            and_(
+                PlayerGameweekStats.gameweek == Fixture.gameweek,
+                PlayerGameweekStats.player_id == player_id
+            )
+        ).filter(
+            Fixture.gameweek >= gameweek_cutoff,
+            Fixture.gameweek < current_gameweek,
+            or_(
+                and_(
+                    Fixture.home_team_id == player_team_id,
+                    Fixture.away_team_id == opponent_id
+                ),
                 and_(
-                    Fixture.gameweek == gameweek,
-                    (Fixture.home_team_id == player_team_id) |
-                    (Fixture.away_team_id == player_team_id)
+                    Fixture.away_team_id == player_team_id,
+                    Fixture.home_team_id == opponent_id
                 )
-            ).first()
-
-            return fixture
-
-        except Exception:
-            return None
-
-
-
-    def _get_player_team_id(self, player_id: int, session: Session) -> Optional[int]:
-        """Get the current team ID for a player"""
-        try:
-            player = session.query(Player).filter(Player.id == player_id).first()
-            return player.team_id if player else None
-        except Exception:
-            return None
-
-
+            )
+        ).all()
 
-    def _get_captain_reasons(self, player: Dict, gameweek: int, session: Session) -> List[str]:
+        return [
+            {
+                'gameweek': gameweek,
+                'points': points,
+                'was_home': home_team_id == player_team_id,
+                'goals': goals,
+                'assists': assists,
+                'minutes': minutes,
+                'clean_sheet': 0,  # not tracked per gameweek in the schema
+            }
+            for gameweek, home_team_id, points, goals, assists, minutes in rows
+        ]
+
+    def _get_captain_reasons(self, player: Dict, fixture_score: float,
+                             home_bonus: float) -> List[str]:
         """Generate human-readable reasons for captain choice"""
         reasons = []
 
         if player['expected_points'] > 8:
             reasons.append(f"High expected points ({player['expected_points']})")
 
-        if self._get_home_advantage(player['team_id'], gameweek, session) > 0:
+        if home_bonus > 0:
             reasons.append("Playing at home")
 
-        fixture_score = self._get_fixture_score(player['team_id'], gameweek, session)
         if fixture_score > 0.15:
             reasons.append("Favorable fixture")
 
-        if player['position'] in ['FWD', 'MID']:
+        if player['position'] in {'FWD', 'MID'}:
             reasons.append(f"Good attacking returns potential ({player['position']})")
 
         return reasons
@@ -474,7 +460,33 @@ class CaptainAdvisor:
 class ChipAdvisor:
     """Provides advice on when to use FPL chips"""
 
-    def __init__(self):
+    # Core selects constructed once at class definition and executed with
+    # bound parameters, so SQLAlchemy's compiled-statement cache serves
+    # every call instead of re-parsing raw SQL strings
+    _TEAM_FIXTURES_STMT = select(
+        Fixture.gameweek, Fixture.home_team_id, Fixture.away_team_id,
+        Fixture.difficulty_home, Fixture.difficulty_away
+    ).where(
+        Fixture.gameweek.between(bindparam('start_gw'), bindparam('end_gw')),
+        or_(Fixture.home_team_id == bindparam('team_id'),
+            Fixture.away_team_id == bindparam('team_id'))
+    )
+    _TEAM_FIXTURES_BULK_STMT = select(
+        Fixture.gameweek, Fixture.home_team_id, Fixture.away_team_id,
+        Fixture.difficulty_home, Fixture.difficulty_away
+    ).where(
+        Fixture.gameweek.between(bindparam('start_gw'), bindparam('end_gw')),
+        or_(Fixture.home_team_id.in_(bindparam('team_ids', expanding=True)),
+            Fixture.away_team_id.in_(bindparam('team_ids', expanding=True)))
+    )
+
+    def __init__(self, captain_advisor: Optional[CaptainAdvisor] = None):
+        # Reuse the caller's advisor (and its precompiled weight tables)
+        # rather than rebuilding one per chip analysis
+        self.captain_advisor = captain_advisor or CaptainAdvisor()
+        # Fixture lists keyed by (team_id, start_gw, end_gw): the chip
+        # analyses ask for the same ranges repeatedly across their loops
+        self._team_fixtures_cache: Dict[tuple, List[Dict]] = {}
         self.chips = {
             'wildcard': {'uses_per_season': 2, 'description': 'Unlimited free transfers'},
             'bench_boost': {'uses_per_season': 1, 'description': 'Points from bench players count'},
@@ -483,32 +495,50 @@ class ChipAdvisor:
         }
 
     def analyze_chip_usage(self, current_team: List[Dict], gameweek: int,
-                           chips_used: Dict[str, bool], session: Session) -> Dict:
+                           chips_used: Dict[str, bool], session: Session,
+                           captain_suggestion: Optional[Dict] = None) -> Dict:
         """
         Analyze optimal chip usage timing
 
         Args:
             chips_used: Dict like {'wildcard': True, 'bench_boost': False, ...}
+            captain_suggestion: an already-computed suggest_captain result,
+                so the triple-captain analysis doesn't repeat the whole pass
         """
-        recommendations = {}
+        # One bulk query warms the fixture cache for every (team, range)
+        # the analyses below will ask for, instead of a SELECT per player
+        # per chip. Wildcard scans five gameweeks ahead.
+        self._prefetch_team_fixtures(
+            {p['team_id'] for p in current_team}, gameweek, gameweek + 4, session
+        )
 
-        # Wildcard analysis
+        analyses = []
         if not chips_used.get('wildcard', False):
-            recommendations['wildcard'] = self._analyze_wildcard(current_team, gameweek, session)
-
-        # Bench Boost analysis
+            analyses.append(('wildcard', lambda s: self._analyze_wildcard(current_team, gameweek, s)))
         if not chips_used.get('bench_boost', False):
-            recommendations['bench_boost'] = self._analyze_bench_boost(current_team, gameweek, session)
-
-        # Triple Captain analysis
+            analyses.append(('bench_boost', lambda s: self._analyze_bench_boost(current_team, gameweek, s)))
         if not chips_used.get('triple_captain', False):
-            recommendations['triple_captain'] = self._analyze_triple_captain(current_team, gameweek, session)
-
-        # Free Hit analysis
+            analyses.append(('triple_captain', lambda s: self._analyze_triple_captain(
+                current_team, gameweek, s, captain_suggestion
+            )))
         if not chips_used.get('free_hit', False):
-            recommendations['free_hit'] = self._analyze_free_hit(current_team, gameweek, session)
+            analyses.append(('free_hit', lambda s: self._analyze_free_hit(current_team, gameweek, s)))
+
+        # The analyses are independent and spend their time waiting on DB
+        # round-trips, so they overlap well in worker threads. Sessions are
+        # not thread-safe: each worker opens its own. Tiny squads (tests,
+        # partial data) aren't worth the thread spin-up.
+        if len(current_team) > 5 and len(analyses) > 1:
+            def run_with_own_session(analyze):
+                with SessionLocal() as worker_session:
+                    return analyze(worker_session)
 
-        return recommendations
+            with ThreadPoolExecutor(max_workers=len(analyses)) as executor:
+                futures = {name: executor.submit(run_with_own_session, analyze)
+                           for name, analyze in analyses}
+                return {name: future.result() for name, future in futures.items()}
+
+        return {name: analyze(session) for name, analyze in analyses}
 
     def _analyze_wildcard(self, current_team: List[Dict], gameweek: int, session: Session) -> Dict:
         """Analyze when to use wildcard"""
@@ -541,20 +571,19 @@ class ChipAdvisor:
 
     def _analyze_bench_boost(self, current_team: List[Dict], gameweek: int, session: Session) -> Dict:
         """Analyze when to use bench boost"""
-        bench_players = [p for p in current_team if p.get('is_bench', False)]
-
-        # Calculate expected bench points
-        bench_expected = sum(p['expected_points'] for p in bench_players)
+        # One pass over the squad accumulates both bench totals instead of
+        # building a bench list and scanning it twice
+        bench_expected = 0.0
+        bench_fixture_score = 0.0
+        for p in current_team:
+            if not p.get('is_bench', False):
+                continue
+            bench_expected += p['expected_points']
+            bench_fixture_score += self._get_fixture_score(p['team_id'], gameweek, session)
 
         # Look for double gameweeks
         double_gameweek_count = self._count_double_gameweeks(current_team, gameweek, session)
 
-        # Check fixture difficulty for bench
-        bench_fixture_score = sum(
-            self._get_fixture_score(p['team_id'], gameweek, session)
-            for p in bench_players
-        )
-
         recommendation = {
             'expected_points': round(bench_expected, 1),
             'urgency': 'High' if bench_expected > 15 else 'Medium' if bench_expected > 10 else 'Low',
@@ -571,11 +600,12 @@ class ChipAdvisor:
 
         return recommendation
 
-    def _analyze_triple_captain(self, current_team: List[Dict], gameweek: int, session: Session) -> Dict:
+    def _analyze_triple_captain(self, current_team: List[Dict], gameweek: int, session: Session,
+                                captain_suggestion: Optional[Dict] = None) -> Dict:
         """Analyze when to use triple captain"""
-        # Find best captain candidate
-        captain_advisor = CaptainAdvisor()
-        captain_suggestion = captain_advisor.suggest_captain(current_team, gameweek, session)
+        # Find best captain candidate, unless the caller already has one
+        if captain_suggestion is None:
+            captain_suggestion = self.captain_advisor.suggest_captain(current_team, gameweek, session)
 
         best_captain = captain_suggestion['captain']
         captain_expected = best_captain['score']
@@ -636,8 +666,11 @@ class ChipAdvisor:
 
     def _calculate_team_value_efficiency(self, team: List[Dict]) -> float:
         """Calculate how efficiently team budget is used (0.0 to 1.0)"""
-        total_price = sum(p['price'] for p in team)
-        total_expected = sum(p['expected_points'] for p in team)
+        total_price = 0.0
+        total_expected = 0.0
+        for p in team:
+            total_price += p['price']
+            total_expected += p['expected_points']
         return min(1.0, total_expected / (total_price * 0.5))  # Rough efficiency metric
 
     def _suggest_wildcard_timing(self, current_gw: int, session: Session) -> str:
@@ -703,22 +736,42 @@ class ChipAdvisor:
             else:
                 return fixture.difficulty_away
 
-    from typing import List, Dict, Any
-    from sqlalchemy.orm import Session
+    def _prefetch_team_fixtures(self, team_ids: set, start_gw: int, end_gw: int,
+                                session: Session) -> None:
+        """Warm the fixture cache for many teams over one range in one query.
+
+        Fills both the full-range key and the single start-gameweek key for
+        every team — including empty lists for teams without a fixture — so
+        the per-player counters never fall through to their own SELECT.
+        """
+        if not team_ids:
+            return
+
+        rows = [dict(row._mapping) for row in session.execute(self._TEAM_FIXTURES_BULK_STMT, {
+            "start_gw": start_gw,
+            "end_gw": end_gw,
+            "team_ids": list(team_ids),
+        })]
+
+        for team_id in team_ids:
+            team_rows = [r for r in rows
+                         if team_id in (r['home_team_id'], r['away_team_id'])]
+            self._team_fixtures_cache[(team_id, start_gw, end_gw)] = team_rows
+            self._team_fixtures_cache[(team_id, start_gw, start_gw)] = [
+                r for r in team_rows if r['gameweek'] == start_gw
+            ]
 
     def _get_team_fixtures(self, team_id: int, start_gw: int, end_gw: int, session: Session) -> List[Dict[str, Any]]:
         """
         Fetch fixtures for a team between two GWs from the DB or API.
         Returns a list of dicts.
         """
-        query = text("""
-                     SELECT gameweek, home_team_id, away_team_id, difficulty_home, difficulty_away
-                     FROM fixtures
-                     WHERE gameweek BETWEEN :start_gw AND :end_gw
-                       AND (home_team_id = :team_id OR away_team_id = :team_id)
-                     """)
-
-        result = session.execute(query, {
+        cache_key = (team_id, start_gw, end_gw)
+        cached = self._team_fixtures_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        result = session.execute(self._TEAM_FIXTURES_STMT, {
             "start_gw": start_gw,
             "end_gw": end_gw,
             "team_id": team_id
@@ -726,14 +779,33 @@ class ChipAdvisor:
 
         # Convert to list of dicts
         fixtures: List[Dict[str, Any]] = [dict(row._mapping) for row in result]
+        self._team_fixtures_cache[cache_key] = fixtures
         return fixtures
 
 
+def _top_k_indices(score, k):
+    """Indices of the k highest scores, highest first, earlier index on ties.
+
+    Partitions instead of sorting the whole array, so large candidate
+    pools cost O(N log K) rather than O(N log N). The composite key folds
+    the index into the score, keeping tie-breaking identical to a stable
+    descending sort.
+    """
+    n = score.size
+    if n <= k:
+        return np.argsort(-score, kind='stable')
+    key = score.astype(np.int64) * n - np.arange(n)
+    top = np.argpartition(-key, k - 1)[:k]
+    return top[np.argsort(-key[top])]
+
+
 class TransferAdvisor:
     """Enhanced transfer recommendations"""
 
     def __init__(self):
         self.transfer_optimizer = TransferOptimizer()
+        # Fixture-run averages per team, keyed by starting gameweek
+        self._fixture_run_cache: Dict[int, Dict[int, float]] = {}
 
     def get_transfer_recommendations(self, current_team: List[Dict],
                                      available_players: List[Dict],
@@ -777,147 +849,175 @@ class TransferAdvisor:
             )
         }
 
+    # Urgency contribution and reason per availability status flag
+    _STATUS_URGENCY = {'i': (3, "Injured"), 's': (3, "Suspended"), 'd': (1, "Doubtful to play")}
+
     def _identify_priority_transfers(self, current_team: List[Dict], session: Session) -> List[Dict]:
         """Identify urgent transfers (injuries, suspensions, etc.)"""
-        priority = []
+        if not current_team:
+            return []
 
-        for player in current_team:
+        # Status and price-drop checks as column comparisons; result dicts
+        # are only built for players with non-zero urgency
+        frame = player_frame(current_team)
+        status = frame['status']
+        price_change = frame['price_change']
+
+        falling = price_change < -0.2
+        urgency = (
+            np.where(status == 'i', 3, 0)
+            + np.where(status == 's', 3, 0)
+            + np.where(status == 'd', 1, 0)
+            + falling
+        )
+
+        priority = []
+        for i in np.argsort(-urgency, kind='stable'):
+            if urgency[i] == 0:
+                break
             reasons = []
-            urgency = 0
-
-            # Check availability status
-            if player.get('status') == 'i':  # Injured
-                reasons.append("Injured")
-                urgency += 3
-            elif player.get('status') == 's':  # Suspended
-                reasons.append("Suspended")
-                urgency += 3
-            elif player.get('status') == 'd':  # Doubtful
-                reasons.append("Doubtful to play")
-                urgency += 1
-
-            # Check price drops
-            if player.get('price_change', 0) < -0.2:
+            flagged = self._STATUS_URGENCY.get(str(status[i]))
+            if flagged:
+                reasons.append(flagged[1])
+            if falling[i]:
                 reasons.append("Falling in price")
-                urgency += 1
-
-            if urgency > 0:
-                priority.append({
-                    'player': player,
-                    'urgency': urgency,
-                    'reasons': reasons
-                })
+            priority.append({
+                'player': current_team[i],
+                'urgency': int(urgency[i]),
+                'reasons': reasons
+            })
 
-        return sorted(priority, key=lambda x: x['urgency'], reverse=True)
+        return priority
 
     def _identify_value_transfers(self, current_team: List[Dict],
                                   available_players: List[Dict],
                                   gameweek: int, session: Session) -> List[Dict]:
         """Identify good value transfer opportunities"""
-        value_transfers = []
+        current_ids = {p['id'] for p in current_team}
+        candidates = [p for p in available_players if p['id'] not in current_ids]
+        if not candidates:
+            return []
 
-        # Find players with good upcoming fixtures and rising prices
-        for player in available_players:
-            if player['id'] in [p['id'] for p in current_team]:
-                continue
+        # Fixture run scores for every team in one query, not one per player
+        fixture_by_team = self._fixture_run_by_team(gameweek, session)
 
-            value_score = 0
-            reasons = []
+        # Score all candidates as column math instead of a Python if-cascade
+        # per player; reasons are only materialized for the winners
+        frame = player_frame(candidates)
+        price_change = frame['price_change']
+        expected = frame['expected_points']
+        form = frame['form']
+        fixture = np.array([fixture_by_team.get(int(tid), 0.0) for tid in frame['team_id']])
 
-            # Price rises
-            if player.get('price_change', 0) > 0.1:
-                reasons.append("Rising in price")
-                value_score += 2
+        rising = price_change > 0.1
+        great_fixtures = fixture > 0.3
+        good_fixtures = (fixture > 0.15) & ~great_fixtures
+        high_expected = expected > 7
+        in_form = form > 6
 
-            # Good fixtures
-            fixture_score = self._calculate_fixture_run(player['team_id'], gameweek, session)
-            if fixture_score > 0.3:
+        score = 2 * rising + 3 * great_fixtures + 1 * good_fixtures + 2 * high_expected + 1 * in_form
+
+        value_transfers = []
+        for i in _top_k_indices(score, 10):
+            if score[i] <= 2:
+                break
+            player = candidates[i]
+            reasons = []
+            if rising[i]:
+                reasons.append("Rising in price")
+            if great_fixtures[i]:
                 reasons.append("Excellent fixture run")
-                value_score += 3
-            elif fixture_score > 0.15:
+            elif good_fixtures[i]:
                 reasons.append("Good upcoming fixtures")
-                value_score += 1
-
-            # High expected points
-            if player['expected_points'] > 7:
+            if high_expected[i]:
                 reasons.append(f"High expected points ({player['expected_points']})")
-                value_score += 2
-
-            # Form
-            if player.get('form', 0) > 6:
+            if in_form[i]:
                 reasons.append("Excellent recent form")
-                value_score += 1
-
-            if value_score > 2:
-                value_transfers.append({
-                    'player': player,
-                    'value_score': value_score,
-                    'reasons': reasons
-                })
+            value_transfers.append({
+                'player': player,
+                'value_score': int(score[i]),
+                'reasons': reasons
+            })
 
-        return sorted(value_transfers, key=lambda x: x['value_score'], reverse=True)[:10]
+        return value_transfers
 
     def _identify_longterm_transfers(self, current_team: List[Dict],
                                      available_players: List[Dict],
                                      session: Session) -> List[Dict]:
         """Identify season keeper transfers"""
-        longterm = []
+        current_ids = {p['id'] for p in current_team}
+        candidates = [p for p in available_players if p['id'] not in current_ids]
+        if not candidates:
+            return []
 
-        for player in available_players:
-            if player['id'] in [p['id'] for p in current_team]:
-                continue
+        # Season keeper criteria as vectorized column math
+        frame = player_frame(candidates)
+        expected = frame['expected_points']
+        price = frame['price']
+        penalties = np.array([bool(p.get('penalties', False)) for p in candidates])
 
-            # Season keeper criteria
-            longterm_score = 0
-            reasons = []
-
-            # Consistent high scorer
-            if player['expected_points'] > 8:
-                reasons.append("Consistent high scorer")
-                longterm_score += 3
+        high_scorer = expected > 8
+        points_per_million = expected / price
+        good_value = points_per_million > 1.5
 
-            # Good value for money
-            points_per_million = player['expected_points'] / player['price']
-            if points_per_million > 1.5:
-                reasons.append(f"Excellent value ({points_per_million:.1f} pts/£m)")
-                longterm_score += 2
+        score = 3 * high_scorer + 2 * good_value + 1 * penalties
 
-            # Key player for team
-            if player.get('penalties', False):
+        longterm = []
+        for i in _top_k_indices(score, 5):
+            if score[i] <= 3:
+                break
+            player = candidates[i]
+            reasons = []
+            if high_scorer[i]:
+                reasons.append("Consistent high scorer")
+            if good_value[i]:
+                reasons.append(f"Excellent value ({points_per_million[i]:.1f} pts/£m)")
+            if penalties[i]:
                 reasons.append("Takes penalties")
-                longterm_score += 1
+            longterm.append({
+                'player': player,
+                'longterm_score': int(score[i]),
+                'reasons': reasons
+            })
 
-            if longterm_score > 3:
-                longterm.append({
-                    'player': player,
-                    'longterm_score': longterm_score,
-                    'reasons': reasons
-                })
+        return longterm
 
-        return sorted(longterm, key=lambda x: x['longterm_score'], reverse=True)[:5]
+    def _fixture_run_by_team(self, start_gw: int, session: Session, gameweeks: int = 6) -> Dict[int, float]:
+        """Average fixture difficulty per team over the next N gameweeks.
 
-    def _calculate_fixture_run(self, team_id: int, start_gw: int, session: Session, gameweeks: int = 6) -> float:
-        """Calculate an average fixture difficulty score for the next N gameweeks"""
-        end_gw = start_gw + gameweeks
-        fixtures = session.query(Fixture).filter(
-            Fixture.gameweek >= start_gw,
-            Fixture.gameweek < end_gw,
-            or_(Fixture.home_team_id == team_id, Fixture.away_team_id == team_id)
-        ).all()
+        One range query covers every team; repeat calls for the same
+        starting gameweek hit the per-instance cache.
+        """
+        cached = self._fixture_run_cache.get(start_gw)
+        if cached is not None:
+            return cached
+
+        # The DB averages per team and sends back ~20 scalars instead of
+        # every fixture row in the range
+        rows = session.query(
+            TeamFixture.team_id, func.avg(TeamFixture.difficulty)
+        ).filter(
+            TeamFixture.gameweek >= start_gw,
+            TeamFixture.gameweek < start_gw + gameweeks
+        ).group_by(TeamFixture.team_id).all()
+
+        by_team = {team_id: avg_difficulty for team_id, avg_difficulty in rows}
+        self._fixture_run_cache[start_gw] = by_team
+        return by_team
 
-        if not fixtures:
-            # If no fixtures found for next gameweek, might be end of season or data issue
-            print(f"⚠️  No fixtures found for team {team_id} in GW {start_gw}-{end_gw - 1}")
-            return 0.0  # No upcoming fixtures
-
-        difficulty_sum = 0
-        for f in fixtures:
-            if f.home_team_id == team_id:
-                difficulty_sum += f.difficulty_home
-            else:
-                difficulty_sum += f.difficulty_away
+    def _calculate_fixture_run(self, team_id: int, start_gw: int, session: Session, gameweeks: int = 6) -> float:
+        """Calculate an average fixture difficulty score for the next N gameweeks.
 
-        return difficulty_sum / len(fixtures)
+        Answered from the cached all-teams map, so asking about each of
+        ~20 teams in turn still costs a single range query rather than
+        one query per call.
+        """
+        run = self._fixture_run_by_team(start_gw, session, gameweeks).get(team_id)
+        if run is None:
+            # Might be end of season or a data issue
+            print(f"⚠️  No fixtures found for team {team_id} in GW {start_gw}-{start_gw + gameweeks - 1}")
+            return 0.0
+        return run
 
     def _generate_transfer_summary(self, priority: List, value: List, longterm: List) -> str:
         """Generate human-readable transfer summary"""
@@ -940,8 +1040,6 @@ class TransferAdvisor:
 
         return "; ".join(summary_parts)
 
-        print("VALUE TRANSFERS SAMPLE:", value[:1])
-
 def check_next_gameweek_data_availability(session: Session, next_gw: int) -> bool:
     """Check if fixture and stats data exists for the next gameweek"""
 
@@ -957,76 +1055,99 @@ def check_next_gameweek_data_availability(session: Session, next_gw: int) -> boo
 def run_complete_advisor():
     """Run the complete FPL advisory system"""
     with SessionLocal() as session:
-        latest_pick = session.query(ManagerPick).order_by(ManagerPick.gameweek.desc()).first()
-        if not latest_pick:
+        # Only the latest gameweek number is needed, so skip hydrating a
+        # full pick (and its eager-loaded player)
+        gw = session.query(ManagerPick.gameweek).order_by(ManagerPick.gameweek.desc()).limit(1).scalar()
+        if gw is None:
             print("No manager picks found.")
             return
 
-        gw = latest_pick.gameweek
         next_gw = gw + 1
-        available_players = get_available_players(session)
-        current_team = get_current_team(session, gw)
+        available_players, current_team = load_gameweek_inputs(session, gw)
+
+        # The report accumulates into one buffer flushed with a single
+        # stdout write at the end, instead of a flush per print call
+        report = []
+        emit = report.append
 
         if not check_next_gameweek_data_availability(session, next_gw):
-            print(f"⚠️  Warning: Limited data available for GW {next_gw}")
-            print("Predictions will be based on current form and general expected points.")
+            emit(f"⚠️  Warning: Limited data available for GW {next_gw}")
+            emit("Predictions will be based on current form and general expected points.")
 
         # Initialize advisors
         captain_advisor = CaptainAdvisor()
-        chip_advisor = ChipAdvisor()
+        chip_advisor = ChipAdvisor(captain_advisor)
         transfer_advisor = TransferAdvisor()
 
-        print(f"\n🏆 FPL Advisory Report - Gameweek {next_gw}\n")
-        print("=" * 50)
+        emit(f"\n🏆 FPL Advisory Report - Gameweek {next_gw}\n")
+        emit("=" * 50)
 
         # 1. Captain Recommendations
-        print("\n👑 CAPTAIN RECOMMENDATIONS")
+        emit("\n👑 CAPTAIN RECOMMENDATIONS")
         captain_rec = captain_advisor.suggest_captain(current_team, next_gw, session)
 
         captain = captain_rec['captain']
         vice = captain_rec['vice_captain']
 
-        print(f"🅲 Captain: {captain['player']['name']} ({captain['player']['position']}) - {captain['score']} pts")
-        print(f"   Reasons: {', '.join(captain['reasons'])}")
-        print(f"🆅 Vice-Captain: {vice['player']['name']} ({vice['player']['position']}) - {vice['score']} pts")
-
-        print("\n📋 Alternatives:")
-        for i, alt in enumerate(captain_rec['alternatives'][:3], 3):
-            print(f"{i}. {alt['player']['name']} - {alt['score']} pts")
+        emit(f"🅲 Captain: {captain['player']['name']} ({captain['player']['position']}) - {captain['score']} pts")
+        emit(f"   Reasons: {', '.join(captain['reasons'])}")
+        emit(f"🆅 Vice-Captain: {vice['player']['name']} ({vice['player']['position']}) - {vice['score']} pts")
+
+        # Flatten the ranking into one DataFrame and format it in a single
+        # to_string call instead of a line per row
+        ranked = [captain, vice] + captain_rec['alternatives'][:3]
+        captain_table = pd.DataFrame({
+            'rank': range(1, len(ranked) + 1),
+            'name': [c['player']['name'] for c in ranked],
+            'position': [c['player']['position'] for c in ranked],
+            'score': [c['score'] for c in ranked],
+        })
+        emit("\n📋 Top candidates:")
+        emit(captain_table.to_string(index=False))
 
         # 2. Transfer Recommendations
-        print(f"\n🔄 TRANSFER RECOMMENDATIONS")
+        emit("\n🔄 TRANSFER RECOMMENDATIONS")
         transfer_rec = transfer_advisor.get_transfer_recommendations(
             current_team, available_players, 100.0, next_gw, session
         )
 
-        print(f"Summary: {transfer_rec['summary']}")
+        emit(f"Summary: {transfer_rec['summary']}")
 
         if transfer_rec['priority_transfers']:
-            print("\n🚨 PRIORITY TRANSFERS:")
+            emit("\n🚨 PRIORITY TRANSFERS:")
             for pt in transfer_rec['priority_transfers'][:3]:
-                print(f"  OUT: {pt['player']['name']} - {', '.join(pt['reasons'])}")
+                emit(f"  OUT: {pt['player']['name']} - {', '.join(pt['reasons'])}")
 
         if transfer_rec['value_transfers']:
-            print("\n💎 VALUE OPPORTUNITIES:")
-            for vt in transfer_rec['value_transfers'][:3]:
-                print(f"  IN: {vt['player']['name']} (£{vt['player']['price']}m) - {', '.join(vt['reasons'])}")
+            value_table = pd.DataFrame({
+                'name': [vt['player']['name'] for vt in transfer_rec['value_transfers'][:3]],
+                'price': [f"£{vt['player']['price']}m" for vt in transfer_rec['value_transfers'][:3]],
+                'score': [vt['value_score'] for vt in transfer_rec['value_transfers'][:3]],
+                'reasons': [', '.join(vt['reasons']) for vt in transfer_rec['value_transfers'][:3]],
+            })
+            emit("\n💎 VALUE OPPORTUNITIES:")
+            emit(value_table.to_string(index=False))
 
         # 3. Chip Usage Advice
-        print(f"\n🃏 CHIP USAGE ADVICE")
+        emit("\n🃏 CHIP USAGE ADVICE")
         chips_used = {'wildcard': False, 'bench_boost': False, 'triple_captain': False, 'free_hit': False}
-        chip_rec = chip_advisor.analyze_chip_usage(current_team, next_gw, chips_used, session)
+        chip_rec = chip_advisor.analyze_chip_usage(
+            current_team, next_gw, chips_used, session, captain_suggestion=captain_rec
+        )
 
         for chip_name, advice in chip_rec.items():
             chip_display = chip_name.replace('_', ' ').title()
-            print(f"\n{chip_display}: {advice['urgency']} Priority")
+            emit(f"\n{chip_display}: {advice['urgency']} Priority")
             if advice.get('reasons'):
-                print(f"  Reasons: {', '.join(advice['reasons'])}")
+                emit(f"  Reasons: {', '.join(advice['reasons'])}")
             if advice.get('best_timing'):
-                print(f"  Timing: {advice['best_timing']}")
+                emit(f"  Timing: {advice['best_timing']}")
+
+        emit("\n" + "=" * 50)
+        emit("✅ Advisory report complete!")
 
-        print("\n" + "=" * 50)
-        print("✅ Advisory report complete!")
+        if VERBOSE:
+            sys.stdout.write("\n".join(report) + "\n")
 
 
 if __name__ == "__main__":
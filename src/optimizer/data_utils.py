@@ -1,31 +1,96 @@
-from data.database import SessionLocal
-from models import Player, ManagerPick
+import numpy as np
+import pandas as pd
+from sqlalchemy import select, text
 from sqlalchemy.orm import Session
 
+from models import Player, ManagerPick
+
+
+def load_stats_frame(session: Session, start_gw: int, end_gw: int) -> pd.DataFrame:
+    """Load gameweek stats for a range of gameweeks straight into a DataFrame.
+
+    Bypasses ORM row materialization so downstream scoring can run as
+    vectorized column math instead of Python loops over objects.
+    """
+    query = text(
+        "SELECT player_id, gameweek, points, expected_points, minutes, bonus, "
+        "expected_goals, expected_assists "
+        "FROM player_gameweek_stats "
+        "WHERE gameweek BETWEEN :start_gw AND :end_gw"
+    )
+    return pd.read_sql_query(
+        query, session.get_bind(), params={"start_gw": start_gw, "end_gw": end_gw}
+    )
+
+def player_frame(players):
+    """Columnar (struct-of-arrays) view of a list of player dicts.
+
+    Scoring loops over many players pay a dict hash lookup per field per
+    player; lifting each field into a NumPy column once lets the scan run
+    as array math. The source dicts stay reachable via 'players' so
+    result rows can still carry the full record.
+    """
+    return {
+        'players': players,
+        'id': np.array([p['id'] for p in players], dtype=np.int32),
+        'team_id': np.array([p['team_id'] for p in players], dtype=np.int32),
+        'position': np.array([p['position'] for p in players], dtype='U3'),
+        'price': np.array([p['price'] for p in players], dtype=np.float32),
+        'expected_points': np.array([p['expected_points'] for p in players], dtype=np.float32),
+        'form': np.array([float(p.get('form', 0)) for p in players], dtype=np.float32),
+        'price_change': np.array([p.get('price_change', 0) for p in players], dtype=np.float32),
+        'status': np.array([p.get('status', 'a') for p in players], dtype='U1'),
+    }
+
 def get_available_players(session: Session):
-    """Fetch all players from the DB and map them for optimization"""
-    players = session.query(Player).all()
+    """Fetch all players from the DB and map them for optimization.
 
-    position_map = {1: 'GK', 2: 'DEF', 3: 'MID', 4: 'FWD'}
+    Reads only the needed columns straight into a DataFrame, so row
+    shaping runs as column operations rather than one ORM object and
+    hand-built dict per player.
+    """
+    stmt = select(
+        Player.id,
+        Player.web_name.label('name'),
+        Player.position_id,
+        Player.now_cost.label('price'),
+        # Use form as proxy for expected points; form is a typed Float
+        # column, so the driver already hands back native floats and no
+        # per-row (or per-column) conversion pass is needed
+        Player.form.label('expected_points'),
+        Player.team_id,
+    ).where(Player.status == 'a')  # Skip unavailable (injured/suspended)
+    df = pd.read_sql_query(stmt, session.get_bind())
+
+    df['position'] = df['position_id'].map({1: 'GK', 2: 'DEF', 3: 'MID', 4: 'FWD'})
+    return df[['id', 'name', 'position', 'price', 'expected_points', 'team_id']].to_dict('records')
+
+# Gameweek inputs keyed by gameweek: the advisor and optimizer entry
+# points all need the same (available_players, current_team) pair, and
+# repeat runs inside one process reuse the previous load instead of
+# re-hydrating both lists per subsystem
+_gameweek_inputs_cache = {}
+
+
+def load_gameweek_inputs(session: Session, gameweek: int):
+    """Load (available_players, current_team) for a gameweek, cached per gameweek"""
+    cached = _gameweek_inputs_cache.get(gameweek)
+    if cached is None:
+        cached = (get_available_players(session), get_current_team(session, gameweek))
+        _gameweek_inputs_cache[gameweek] = cached
+    return cached
 
-    available = []
-    for p in players:
-        if p.status != 'a':  # Skip unavailable (injured/suspended)
-            continue
-        available.append({
-            'id': p.id,
-            'name': p.web_name,
-            'position': position_map[p.position_id],
-            'price': p.now_cost,
-            'expected_points': float(p.form),  # Use form as proxy for expected points
-            'team_id': p.team_id
-        })
-    return available
 
 def get_current_team(session: Session, gameweek: int):
     """Get the user's current squad for the given gameweek"""
-    picks = session.query(ManagerPick).filter_by(gameweek=gameweek).all()
-    players = session.query(Player).filter(Player.id.in_([p.player_id for p in picks])).all()
+    # One joined SELECT instead of a picks query followed by a player
+    # batch load; ordering by pick position keeps the squad in its
+    # starting-XI-then-bench order
+    players = session.query(Player).join(
+        ManagerPick, ManagerPick.player_id == Player.id
+    ).filter(
+        ManagerPick.gameweek == gameweek
+    ).order_by(ManagerPick.position).all()
 
     position_map = {1: 'GK', 2: 'DEF', 3: 'MID', 4: 'FWD'}
 
@@ -36,7 +101,7 @@ def get_current_team(session: Session, gameweek: int):
             'name': p.web_name,
             'position': position_map[p.position_id],
             'price': p.now_cost,
-            'expected_points': float(p.form),
+            'expected_points': p.form,  # already a native float from the typed column
             'team_id': p.team_id
         })
     return team
\ No newline at end of file
@@ -1,15 +1,22 @@
+import numpy as np
 import pulp
-from collections import defaultdict
 from typing import List, Dict
 from models import ManagerPick
 from data.database import SessionLocal
-from optimizer.data_utils import get_available_players, get_current_team
+from optimizer.data_utils import load_gameweek_inputs, player_frame
 
 
 class TransferOptimizer:
-    def __init__(self, transfer_cost: float = 4.0, free_transfers: int = 1):
+    def __init__(self, transfer_cost: float = 4.0, free_transfers: int = 1,
+                 candidate_pool_size: int = 40):
         self.transfer_cost = transfer_cost
         self.free_transfers = free_transfers
+        self.candidate_pool_size = candidate_pool_size
+        # Decision variables reused across model builds, keyed by name
+        self._var_cache: Dict[str, pulp.LpVariable] = {}
+        # One configured solver reused across solves; building a fresh
+        # solver object per call re-resolves the CBC binary each time
+        self._solver = pulp.PULP_CBC_CMD(msg=False)
 
     def optimize_transfers(self, current_team: List[Dict], available_players: List[Dict],
                            budget: float, gameweeks_ahead: int = 1) -> Dict:
@@ -20,38 +27,45 @@ class TransferOptimizer:
         - Dict with 'selected_team', 'transfers_in', 'transfers_out', 'cost'
         """
 
+        # Current team player IDs
+        current_ids = {p['id'] for p in current_team}
+        available_players = self._prune_candidates(available_players, current_ids)
+
         # Create optimization problem
         prob = pulp.LpProblem("FPL_Transfer_Optimization", pulp.LpMaximize)
 
-        # Decision variables
-        player_vars = {
-            p['id']: pulp.LpVariable(f"select_{p['id']}", cat='Binary')
-            for p in available_players
-        }
+        # Columnar view: coefficient vectors come out as array math
+        # instead of a dict lookup per term while building expressions
+        frame = player_frame(available_players)
+        ids = frame['id'].tolist()
 
-        transfer_in_vars = {
-            p['id']: pulp.LpVariable(f"transfer_in_{p['id']}", cat='Binary')
-            for p in available_players
-        }
+        # Decision variables, aligned with the frame's row order
+        select_list = [self._binary_var(f"select_{pid}") for pid in ids]
+        transfer_in_list = [self._binary_var(f"transfer_in_{pid}") for pid in ids]
+        player_vars = dict(zip(ids, select_list))
+        transfer_in_vars = dict(zip(ids, transfer_in_list))
 
         transfer_out_vars = {
-            p['id']: pulp.LpVariable(f"transfer_out_{p['id']}", cat='Binary')
+            p['id']: self._binary_var(f"transfer_out_{p['id']}")
             for p in current_team
         }
 
-        # Current team player IDs
-        current_ids = {p['id'] for p in current_team}
+        # OBJECTIVE: Maximize expected points minus transfer costs.
+        # Hits only apply beyond the free allowance, so the penalty is
+        # max(0, transfers - free) * cost. Linearized with a non-negative
+        # excess variable: the maximization drives it down to exactly
+        # that max. The old (transfers - free) * cost form went negative
+        # for fewer-than-free transfers, i.e. it paid a bonus for
+        # leaving transfers unused.
+        total_transfers = pulp.lpSum(transfer_in_list)
+        excess_transfers = pulp.LpVariable("excess_transfers", lowBound=0)
 
-        # OBJECTIVE: Maximize expected points minus transfer costs
-        total_transfers = pulp.lpSum([transfer_in_vars[p['id']] for p in available_players])
-        transfer_point_penalty = pulp.lpSum([
-            (total_transfers - self.free_transfers) * self.transfer_cost
-        ])
+        expected = (frame['expected_points'] * gameweeks_ahead).tolist()
+        prob += pulp.LpAffineExpression(zip(select_list, expected)) \
+            - excess_transfers * self.transfer_cost, "TotalValue"
 
-        prob += pulp.lpSum([
-            player_vars[p['id']] * p['expected_points'] * gameweeks_ahead
-            for p in available_players
-        ]) - transfer_point_penalty, "TotalValue"
+        # CONSTRAINT: excess_transfers >= transfers beyond the free allowance
+        prob += excess_transfers >= total_transfers - self.free_transfers
 
         # CONSTRAINT: Link selection with transfers
         for p in available_players:
@@ -64,52 +78,50 @@ class TransferOptimizer:
                 prob += player_vars[p['id']] == transfer_in_vars[p['id']]
 
         # CONSTRAINT: Equal transfers in and out
-        prob += (pulp.lpSum([transfer_in_vars[p['id']] for p in available_players]) ==
-                 pulp.lpSum([transfer_out_vars[p['id']] for p in current_team]))
+        prob += total_transfers == pulp.lpSum([transfer_out_vars[p['id']] for p in current_team])
 
-        # CONSTRAINT: Budget (including transfer costs)
-        current_team_value = sum(p['price'] for p in current_team)
+        # CONSTRAINT: Budget
+        # Calculate selling prices (typically 50% of price rise) as one
+        # coefficient vector rather than a method dispatch per lpSum term
+        selling_prices = np.array([self._get_selling_price(p) for p in current_team])
+        money_from_sales = pulp.LpAffineExpression(
+            zip((transfer_out_vars[p['id']] for p in current_team), selling_prices.tolist())
+        )
 
-        # Calculate selling prices (typically 50% of price rise)
-        money_from_sales = pulp.lpSum([
-            transfer_out_vars[p['id']] * self._get_selling_price(p)
-            for p in current_team
-        ])
-
-        money_for_purchases = pulp.lpSum([
-            transfer_in_vars[p['id']] * p['price']
-            for p in available_players
-        ])
+        money_for_purchases = pulp.LpAffineExpression(
+            zip(transfer_in_list, frame['price'].tolist())
+        )
 
         prob += (money_for_purchases - money_from_sales) <= budget, "Budget"
 
         # CONSTRAINT: Squad composition (15 players total)
-        prob += pulp.lpSum([player_vars[p['id']] for p in available_players]) == 15
+        prob += pulp.lpSum(select_list) == 15
 
         # CONSTRAINT: Position requirements
         positions = {'GK': 2, 'DEF': 5, 'MID': 5, 'FWD': 3}
         for pos, count in positions.items():
-            pos_players = [p for p in available_players if p['position'] == pos]
-            prob += pulp.lpSum([player_vars[p['id']] for p in pos_players]) == count
+            pos_idx = np.flatnonzero(frame['position'] == pos)
+            prob += pulp.lpSum([select_list[i] for i in pos_idx]) == count
 
         # CONSTRAINT: Max 3 players per team
-        team_groups = defaultdict(list)
-        for p in available_players:
-            team_groups[p['team_id']].append(p)
-
-        for team_id, group in team_groups.items():
-            prob += pulp.lpSum([player_vars[p['id']] for p in group]) <= 3
+        unique_teams, team_inverse = np.unique(frame['team_id'], return_inverse=True)
+        for t_idx in range(unique_teams.size):
+            team_idx = np.flatnonzero(team_inverse == t_idx)
+            prob += pulp.lpSum([select_list[i] for i in team_idx]) <= 3
 
         # Solve
-        prob.solve(pulp.PULP_CBC_CMD(msg=False))
+        prob.solve(self._solver)
 
         if prob.status != pulp.LpStatusOptimal:
             raise Exception("Optimization failed to find optimal solution")
 
-        # Extract results
-        selected_team = [p for p in available_players if pulp.value(player_vars[p['id']]) == 1]
-        transfers_in = [p for p in available_players if pulp.value(transfer_in_vars[p['id']]) == 1]
-        transfers_out = [p for p in current_team if pulp.value(transfer_out_vars[p['id']]) == 1]
+        # Extract results: read each variable's solved value once into an
+        # array and mask, rather than a pulp.value call per player per list
+        select_vals = np.array([v.varValue for v in select_list])
+        in_vals = np.array([v.varValue for v in transfer_in_list])
+        selected_team = [available_players[i] for i in np.flatnonzero(select_vals > 0.5)]
+        transfers_in = [available_players[i] for i in np.flatnonzero(in_vals > 0.5)]
+        transfers_out = [p for p in current_team if transfer_out_vars[p['id']].varValue > 0.5]
 
         total_point_penalty = max(0, len(transfers_in) - self.free_transfers) * self.transfer_cost
 
@@ -123,6 +135,51 @@ class TransferOptimizer:
             'remaining_budget': budget
         }
 
+    def _binary_var(self, name: str) -> pulp.LpVariable:
+        """Binary decision variable, reused across model builds.
+
+        The model structure repeats from gameweek to gameweek with only
+        the coefficients changing, so variable objects are cached by
+        name and shared between successive LpProblems instead of being
+        re-instantiated per solve (PuLP writes each solve's result onto
+        the variable, so sequential reuse is safe).
+        """
+        var = self._var_cache.get(name)
+        if var is None:
+            var = pulp.LpVariable(name, cat='Binary')
+            self._var_cache[name] = var
+        return var
+
+    def _prune_candidates(self, available_players: List[Dict],
+                          current_ids=frozenset()) -> List[Dict]:
+        """Heuristic pre-filter of the candidate pool before LP construction.
+
+        Keeps the current squad plus the top candidate_pool_size players
+        per position by expected points per million. Model build and MIP
+        solve both scale with the number of binary variables, and players
+        deep down the value-density ranking never reach the optimum.
+        Pass candidate_pool_size=None to the constructor to disable.
+        """
+        k = self.candidate_pool_size
+        if k is None or not available_players:
+            return available_players
+
+        frame = player_frame(available_players)
+        density = frame['expected_points'] / frame['price']
+
+        keep = np.zeros(len(available_players), dtype=bool)
+        for pos in ('GK', 'DEF', 'MID', 'FWD'):
+            pos_idx = np.flatnonzero(frame['position'] == pos)
+            if pos_idx.size > k:
+                pos_idx = pos_idx[np.argpartition(-density[pos_idx], k - 1)[:k]]
+            keep[pos_idx] = True
+        if current_ids:
+            keep |= np.isin(frame['id'], list(current_ids))
+
+        if keep.all():
+            return available_players
+        return [available_players[i] for i in np.flatnonzero(keep)]
+
     def _get_selling_price(self, player: Dict) -> float:
         """Calculate selling price considering price changes"""
         # Simplified - in reality you'd track purchase price vs current price
@@ -130,41 +187,36 @@ class TransferOptimizer:
 
     def optimize_wildcard(self, available_players: List[Dict], budget: float) -> List[Dict]:
         """Optimize team selection when using wildcard (no transfer costs)"""
+        available_players = self._prune_candidates(available_players)
+
         prob = pulp.LpProblem("FPL_Wildcard_Optimization", pulp.LpMaximize)
 
-        player_vars = {
-            p['id']: pulp.LpVariable(f"player_{p['id']}", cat='Binary')
-            for p in available_players
-        }
+        frame = player_frame(available_players)
+        select_list = [self._binary_var(f"player_{pid}") for pid in frame['id'].tolist()]
+        player_vars = dict(zip(frame['id'].tolist(), select_list))
 
         # Objective: Maximize expected points
-        prob += pulp.lpSum([
-            player_vars[p['id']] * p['expected_points']
-            for p in available_players
-        ])
+        prob += pulp.LpAffineExpression(zip(select_list, frame['expected_points'].tolist()))
 
         # Standard FPL constraints
-        prob += pulp.lpSum([
-            player_vars[p['id']] * p['price'] for p in available_players
-        ]) <= budget
+        prob += pulp.LpAffineExpression(zip(select_list, frame['price'].tolist())) <= budget
 
-        prob += pulp.lpSum([player_vars[p['id']] for p in available_players]) == 15
+        prob += pulp.lpSum(select_list) == 15
 
         positions = {'GK': 2, 'DEF': 5, 'MID': 5, 'FWD': 3}
         for pos, count in positions.items():
-            pos_players = [p for p in available_players if p['position'] == pos]
-            prob += pulp.lpSum([player_vars[p['id']] for p in pos_players]) == count
-
-        team_groups = defaultdict(list)
-        for p in available_players:
-            team_groups[p['team_id']].append(p)
+            pos_idx = np.flatnonzero(frame['position'] == pos)
+            prob += pulp.lpSum([select_list[i] for i in pos_idx]) == count
 
-        for team_id, group in team_groups.items():
-            prob += pulp.lpSum([player_vars[p['id']] for p in group]) <= 3
+        unique_teams, team_inverse = np.unique(frame['team_id'], return_inverse=True)
+        for t_idx in range(unique_teams.size):
+            team_idx = np.flatnonzero(team_inverse == t_idx)
+            prob += pulp.lpSum([select_list[i] for i in team_idx]) <= 3
 
-        prob.solve(pulp.PULP_CBC_CMD(msg=False))
+        prob.solve(self._solver)
 
-        return [p for p in available_players if pulp.value(player_vars[p['id']]) == 1]
+        select_vals = np.array([v.varValue for v in select_list])
+        return [available_players[i] for i in np.flatnonzero(select_vals > 0.5)]
 
 
 # Enhanced main function
@@ -176,8 +228,7 @@ def run_enhanced_optimizer():
             return
 
         gw = latest_pick.gameweek
-        available_players = get_available_players(session)
-        current_team = get_current_team(session, gw)
+        available_players, current_team = load_gameweek_inputs(session, gw)
 
         optimizer = TransferOptimizer(transfer_cost=4.0, free_transfers=1)
 